@@ -4,22 +4,118 @@ import io
 import base64
 import asyncio
 import threading
+from time import perf_counter as _perf_counter
 from typing import Callable, Awaitable
 
 import numpy as np
-import pyaudio
-import sounddevice as sd
 from pydub import AudioSegment
 
 from openai.resources.beta.realtime.realtime import AsyncRealtimeConnection
 
+import metrics
+
 CHUNK_LENGTH_S = 0.05  # 100ms
 SAMPLE_RATE = 24000
-FORMAT = pyaudio.paInt16
+FORMAT = 8  # pyaudio.paInt16, without importing PortAudio bindings at module load
 CHANNELS = 1
 
 # pyright: reportUnknownMemberType=false, reportUnknownVariableType=false, reportUnknownArgumentType=false
 
+# Realtime API audio formats. G.711 is fixed at 8kHz, one byte per sample.
+AUDIO_FORMATS = ("pcm16", "g711_ulaw", "g711_alaw")
+G711_SAMPLE_RATE = 8000
+
+_ULAW_BIAS = 0x84
+_ULAW_CLIP = 8159  # 14-bit magnitude
+
+
+def _ulaw_tables() -> tuple[np.ndarray, np.ndarray]:
+    """Build the (encode, decode) lookup tables for G.711 mu-law."""
+    # decode: 256 code bytes -> int16 sample
+    u = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (u >> 4) & 0x07
+    mantissa = u & 0x0F
+    magnitude = (((mantissa << 3) + _ULAW_BIAS) << exponent) - _ULAW_BIAS
+    decode = np.where(u & 0x80, -magnitude, magnitude).astype(np.int16)
+
+    # encode: every int16 sample (indexed by its uint16 bit pattern) -> code byte
+    pcm = np.arange(65536, dtype=np.int32)
+    pcm = np.where(pcm >= 32768, pcm - 65536, pcm) >> 2
+    mask = np.where(pcm >= 0, 0xFF, 0x7F)
+    magnitude = np.minimum(np.abs(pcm), _ULAW_CLIP) + (_ULAW_BIAS >> 2)
+    segment = np.searchsorted(np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF]), magnitude)
+    code = np.where(segment >= 8, 0x7F, (np.minimum(segment, 7) << 4) | ((magnitude >> (segment + 1)) & 0x0F))
+    encode = ((code ^ mask) & 0xFF).astype(np.uint8)
+    return encode, decode
+
+
+def _alaw_tables() -> tuple[np.ndarray, np.ndarray]:
+    """Build the (encode, decode) lookup tables for G.711 A-law."""
+    # decode: 256 code bytes -> int16 sample
+    a = np.arange(256, dtype=np.int32) ^ 0x55
+    segment = (a & 0x70) >> 4
+    t = ((a & 0x0F) << 4) + np.where(segment == 0, 8, 0x108)
+    t = np.where(segment > 1, t << np.maximum(segment - 1, 0), t)
+    decode = np.where(a & 0x80, t, -t).astype(np.int16)
+
+    # encode: every int16 sample (indexed by its uint16 bit pattern) -> code byte
+    pcm = np.arange(65536, dtype=np.int32)
+    pcm = np.where(pcm >= 32768, pcm - 65536, pcm) >> 3
+    mask = np.where(pcm >= 0, 0xD5, 0x55)
+    pcm = np.where(pcm >= 0, pcm, -pcm - 1)
+    segment = np.searchsorted(np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF]), pcm)
+    shift = np.where(segment < 2, 1, segment)
+    code = np.where(segment >= 8, 0x7F, (np.minimum(segment, 7) << 4) | ((pcm >> shift) & 0x0F))
+    encode = ((code ^ mask) & 0xFF).astype(np.uint8)
+    return encode, decode
+
+
+class AudioCodec:
+    """Converts between int16 PCM samples and a Realtime API wire format.
+
+    G.711 variants use 64K-entry/256-entry lookup tables so a whole frame is
+    encoded or decoded with a single numpy indexing operation.
+    """
+
+    def __init__(self, name: str = "pcm16"):
+        if name not in AUDIO_FORMATS:
+            raise ValueError(f"unsupported audio format: {name} (expected one of {', '.join(AUDIO_FORMATS)})")
+        self.name = name
+        self.sample_rate = SAMPLE_RATE if name == "pcm16" else G711_SAMPLE_RATE
+        self.bytes_per_sample = 2 if name == "pcm16" else 1
+        self._encode_table = None
+        self._decode_table = None
+        if name == "g711_ulaw":
+            self._encode_table, self._decode_table = _ulaw_tables()
+        elif name == "g711_alaw":
+            self._encode_table, self._decode_table = _alaw_tables()
+
+    def encode(self, samples: np.ndarray) -> bytes:
+        """Encode int16 PCM samples into wire-format bytes."""
+        samples = np.ascontiguousarray(samples, dtype=np.int16).reshape(-1)
+        if self._encode_table is None:
+            return samples.tobytes()
+        return self._encode_table[samples.view(np.uint16)].tobytes()
+
+    def decode(self, data: bytes) -> np.ndarray:
+        """Decode wire-format bytes into int16 PCM samples."""
+        if self._decode_table is None:
+            return np.frombuffer(data, dtype=np.int16)
+        return self._decode_table[np.frombuffer(data, dtype=np.uint8)]
+
+    def wire_bytes_per_second(self) -> float:
+        """Base64 payload size of one second of audio in this format."""
+        return self.sample_rate * CHANNELS * self.bytes_per_sample * 4 / 3
+
+    def bandwidth_summary(self) -> str:
+        """Describe the per-direction bandwidth relative to pcm16."""
+        rate = self.wire_bytes_per_second()
+        baseline = AudioCodec().wire_bytes_per_second()
+        summary = f"audio format {self.name}: ~{rate / 1000:.1f} KB/s per direction"
+        if self.name != "pcm16":
+            summary += f" vs {baseline / 1000:.1f} KB/s for pcm16 ({(1 - rate / baseline) * 100:.0f}% less)"
+        return summary
+
 
 def audio_to_pcm16_base64(audio_bytes: bytes) -> bytes:
     # load the audio file from the byte stream
@@ -31,20 +127,33 @@ def audio_to_pcm16_base64(audio_bytes: bytes) -> bytes:
 
 
 class AudioPlayerAsync:
-    def __init__(self):
+    def __init__(self, codec: AudioCodec | None = None, headless: bool = False):
         self.queue = []
         self.lock = threading.Lock()
-        self.stream = sd.OutputStream(
-            callback=self.callback,
-            samplerate=SAMPLE_RATE,
-            channels=CHANNELS,
-            dtype=np.int16,
-            blocksize=int(CHUNK_LENGTH_S * SAMPLE_RATE),
-        )
+        self.codec = codec or AudioCodec()
+        self.blocksize = int(CHUNK_LENGTH_S * self.codec.sample_rate)
+        # headless players have no output device; callback is driven by the caller (e.g. benchmarks)
+        self.stream = None
+        if not headless:
+            import sounddevice as sd  # type: ignore
+
+            self.stream = sd.OutputStream(
+                callback=self.callback,
+                samplerate=self.codec.sample_rate,
+                channels=CHANNELS,
+                dtype=np.int16,
+                blocksize=self.blocksize,
+            )
         self.playing = False
         self._frame_count = 0
+        self._starved = True
+        self.recorder = None  # optional SessionRecorder receiving played audio
+        self.profiler = None  # optional Profiler timing each callback against its deadline
 
     def callback(self, outdata, frames, time, status):  # noqa
+        # only pay for timing when someone is collecting it
+        timed = metrics.ENABLED or self.profiler is not None
+        started = _perf_counter() if timed else 0.0
         with self.lock:
             data = np.empty(0, dtype=np.int16)
 
@@ -58,12 +167,31 @@ class AudioPlayerAsync:
 
             self._frame_count += len(data)
 
+            if self.recorder is not None and len(data) > 0:
+                self.recorder.record_audio("speaker", data.tobytes())
+
             # fill the rest of the frames with zeros if there is no more data
-            if len(data) < frames:
+            starved = len(data) < frames
+            if starved:
                 data = np.concatenate((data, np.zeros(frames - len(data), dtype=np.int16)))
 
+            # count the transition into silence rather than every silent block while idle
+            underrun = starved and not self._starved
+            self._starved = starved
+
         outdata[:] = data.reshape(-1, 1)
 
+        if not timed:
+            return
+        if underrun:
+            metrics.audio_underruns_total.inc()
+        duration = _perf_counter() - started
+        metrics.audio_callback_seconds.observe(duration)
+        if self.profiler is not None:
+            self.profiler.record_audio_callback(
+                duration, frames / self.codec.sample_rate, bool(status and status.output_underflow)
+            )
+
     def reset_frame_count(self):
         self._frame_count = 0
 
@@ -72,24 +200,27 @@ class AudioPlayerAsync:
 
     def add_data(self, data: bytes):
         with self.lock:
-            # bytes is pcm16 single channel audio data, convert to numpy array
-            np_data = np.frombuffer(data, dtype=np.int16)
+            # bytes is single channel audio in the codec's wire format, convert to pcm16 numpy array
+            np_data = self.codec.decode(data)
             self.queue.append(np_data)
             if not self.playing:
                 self.start()
 
     def start(self):
         self.playing = True
-        self.stream.start()
+        if self.stream:
+            self.stream.start()
 
     def stop(self):
         self.playing = False
-        self.stream.stop()
+        if self.stream:
+            self.stream.stop()
         with self.lock:
             self.queue = []
 
     def terminate(self):
-        self.stream.close()
+        if self.stream:
+            self.stream.close()
 
 
 async def send_audio_worker_sounddevice(
@@ -97,6 +228,8 @@ async def send_audio_worker_sounddevice(
     should_send: Callable[[], bool] | None = None,
     start_send: Callable[[], Awaitable[None]] | None = None,
 ):
+    import sounddevice as sd  # type: ignore
+
     sent_audio = False
 
     device_info = sd.query_devices()
@@ -0,0 +1,268 @@
+#!/usr/bin/env uv run
+#
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "numpy",
+#     "pyaudio",
+#     "pydub",
+#     "sounddevice",
+#     "openai[realtime]",
+#     "fastmcp",
+#     "pynput",
+# ]
+#
+# ///
+"""Micro-benchmarks for typo's hot paths.
+
+Runs headless (no audio devices, network or MCP servers) and writes the
+results as JSON so runs can be compared between commits:
+
+    ./bench.py                                  # writes bench-<commit>.json
+    ./bench.py --output before.json
+    ./bench.py --compare before.json            # prints the change per benchmark
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import base64
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+from typing import Callable
+
+import numpy as np
+
+from audio_util import SAMPLE_RATE, AudioCodec, AudioPlayerAsync
+
+# RealtimeApp builds an OpenAI client up front; no request is ever made
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+import typo  # noqa: E402
+
+
+def measure(run: Callable[[], None], number: int, repeat: int = 7, setup: Callable[[], None] | None = None) -> dict:
+    """Time `run` (which performs `number` operations) `repeat` times and summarise per-operation cost."""
+    per_op = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        run()
+        per_op.append((time.perf_counter() - started) / number)
+    median = statistics.median(per_op)
+    return {
+        "median_us": median * 1e6,
+        "min_us": min(per_op) * 1e6,
+        "ops_per_sec": 1 / median if median else float("inf"),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def bench_audio_callback(results: dict) -> None:
+    """AudioPlayerAsync.callback block fill time for different queue shapes."""
+    player = AudioPlayerAsync(headless=True)
+    frames = player.blocksize
+    outdata = np.empty((frames, 1), dtype=np.int16)
+    blocks = 500
+
+    shapes = {
+        # name -> (samples per queued item, number of items) for `blocks` callbacks
+        "empty": (0, 0),
+        "single_large_item": (frames * blocks, 1),
+        "block_sized_items": (frames, blocks),
+        "small_items_10ms": (SAMPLE_RATE // 100, frames * blocks // (SAMPLE_RATE // 100)),
+        "tiny_items_1ms": (SAMPLE_RATE // 1000, frames * blocks // (SAMPLE_RATE // 1000)),
+    }
+    for name, (item_samples, item_count) in shapes.items():
+        item = np.ones(item_samples, dtype=np.int16)
+
+        def setup():
+            player.queue = [item] * item_count
+
+        def run():
+            for _ in range(blocks):
+                player.callback(outdata, frames, None, None)
+
+        results[f"audio_callback.{name}"] = measure(run, blocks, setup=setup)
+
+
+def bench_add_data(results: dict) -> None:
+    """AudioPlayerAsync.add_data throughput for typical response.audio.delta sizes."""
+    for codec_name in ("pcm16", "g711_ulaw"):
+        codec = AudioCodec(codec_name)
+        player = AudioPlayerAsync(codec, headless=True)
+        player.playing = True  # skip start(), there is no device
+        chunk = codec.encode(np.zeros(codec.sample_rate // 10, dtype=np.int16))  # 100ms
+        number = 2000
+
+        def setup():
+            player.queue = []
+
+        def run():
+            for _ in range(number):
+                player.add_data(chunk)
+
+        result = measure(run, number, setup=setup)
+        result["mb_per_sec"] = result["ops_per_sec"] * len(chunk) / 1e6
+        results[f"add_data.{codec_name}_100ms"] = result
+
+
+def bench_base64_frames(results: dict) -> None:
+    """Encode/decode of 20ms frames as done in send_mic_audio and for response.audio.delta."""
+    number = 5000
+    for codec_name in ("pcm16", "g711_ulaw", "g711_alaw"):
+        codec = AudioCodec(codec_name)
+        rng = np.random.default_rng(0)
+        frame = rng.integers(-32768, 32767, size=(int(codec.sample_rate * 0.02), 1), dtype=np.int16)
+        delta = base64.b64encode(codec.encode(frame)).decode("utf-8")
+
+        def encode():
+            for _ in range(number):
+                base64.b64encode(codec.encode(frame)).decode("utf-8")
+
+        def decode():
+            for _ in range(number):
+                codec.decode(base64.b64decode(delta))
+
+        results[f"mic_frame_encode.{codec_name}_20ms"] = measure(encode, number)
+        results[f"audio_delta_decode.{codec_name}_20ms"] = measure(decode, number)
+
+
+def bench_serialize_mcp_result(results: dict) -> None:
+    """MCPClient.serialize_mcp_result on large tool outputs."""
+    client = typo.MCPClient()
+    cases = {
+        "many_text_items": {"success": True, "isError": False, "content": [
+            {"type": "text", "text": f"line {i}: " + "x" * 80} for i in range(5000)
+        ]},
+        "many_object_items": {"success": True, "isError": False, "content": [
+            SimpleNamespace(type="text", text=f"line {i}: " + "x" * 80) for i in range(5000)
+        ]},
+        "single_1mb_item": {"success": True, "isError": False, "content": [
+            {"type": "text", "text": "x" * 1_000_000}
+        ]},
+    }
+    for name, result in cases.items():
+        number = 20
+
+        def run():
+            for _ in range(number):
+                json.dumps(client.serialize_mcp_result(result))
+
+        results[f"serialize_mcp_result.{name}"] = measure(run, number)
+
+
+def bench_event_dispatch(results: dict) -> None:
+    """RealtimeApp.handle_event with synthetic events."""
+    app = typo.RealtimeApp(headless=True)
+    app.audio_player.playing = True  # skip start(), there is no device
+    audio_delta = base64.b64encode(np.zeros(SAMPLE_RATE // 10, dtype=np.int16).tobytes()).decode("utf-8")
+
+    events = {
+        "audio_delta": SimpleNamespace(type="response.audio.delta", item_id="item_1", delta=audio_delta),
+        "transcript_delta": SimpleNamespace(type="response.audio_transcript.delta", delta="hello "),
+        "speech_started": SimpleNamespace(type="input_audio_buffer.speech_started"),
+        "unhandled": SimpleNamespace(type="rate_limits.updated"),
+    }
+    number = 2000
+    loop = asyncio.new_event_loop()
+    try:
+        for name, event in events.items():
+            async def dispatch():
+                for _ in range(number):
+                    await app.handle_event(event)
+
+            def setup():
+                app.audio_player.queue = []
+
+            def run():
+                # Transcript deltas print to the terminal
+                with contextlib.redirect_stdout(io.StringIO()):
+                    loop.run_until_complete(dispatch())
+
+            results[f"event_dispatch.{name}"] = measure(run, number, setup=setup)
+    finally:
+        loop.close()
+
+
+BENCHMARKS = {
+    "audio_callback": bench_audio_callback,
+    "add_data": bench_add_data,
+    "base64_frames": bench_base64_frames,
+    "serialize_mcp_result": bench_serialize_mcp_result,
+    "event_dispatch": bench_event_dispatch,
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline_path: str) -> None:
+    """Print the per-benchmark change in median time against a previous run."""
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    print(f"\ncompared with {baseline_path} ({baseline.get('commit', 'unknown')}):")
+    for name, result in results["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if not previous:
+            print(f"  {name:<45} new")
+            continue
+        change = (result["median_us"] - previous["median_us"]) / previous["median_us"] * 100
+        print(f"  {name:<45} {previous['median_us']:>10.2f}us -> {result['median_us']:>10.2f}us  ({change:+.1f}%)")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Run typo's hot path micro-benchmarks.")
+    parser.add_argument("--output", default=None, help="results file (default: bench-<commit>.json)")
+    parser.add_argument("--compare", metavar="FILE", default=None, help="previous results to compare against")
+    parser.add_argument("--only", choices=BENCHMARKS, action="append", help="run only these benchmark groups")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    commit = git_commit()
+
+    benchmarks: dict[str, dict] = {}
+    for name, bench in BENCHMARKS.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"running {name}...", file=sys.stderr)
+        bench(benchmarks)
+
+    results = {
+        "commit": commit,
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": benchmarks,
+    }
+    for name, result in benchmarks.items():
+        print(f"{name:<45} {result['median_us']:>10.2f}us  {result['ops_per_sec']:>12.0f} ops/s")
+
+    output = args.output or f"bench-{commit}.json"
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Minimal Prometheus-style metrics for typo.
+
+Nothing is recorded until the local HTTP endpoint is started with
+`start_metrics_server`; until then every update returns before taking a lock,
+and hot paths such as the audio callback check `ENABLED` to skip timing too.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set by start_metrics_server
+ENABLED = False
+
+# Upper bounds in seconds
+AUDIO_CALLBACK_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+APPROVAL_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{escaped}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+        self.lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        with self.lock:
+            return self.values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value that can go up and down per label set."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        if not ENABLED:
+            return
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed observations per label set."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts..., +Inf count, sum]
+        self.values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            else:
+                state[len(self.buckets)] += 1
+            state[-1] += value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self.lock:
+            for key, state in sorted(self.values.items()):
+                cumulative = 0.0
+                labels = _format_labels(self.label_names, key)
+                for bound, count in zip(self.buckets, state):
+                    cumulative += count
+                    bucket_labels = _format_labels(self.label_names, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                cumulative += state[len(self.buckets)]
+                bucket_labels = _format_labels(self.label_names, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{self.name}_sum{labels} {state[-1]}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in Prometheus text format."""
+
+    def __init__(self):
+        self.metrics: list[_Metric] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+audio_callback_seconds = REGISTRY.register(Histogram(
+    "typo_audio_callback_seconds", "Time spent filling one output block in the audio callback.",
+    buckets=AUDIO_CALLBACK_BUCKETS,
+))
+audio_underruns_total = REGISTRY.register(Counter(
+    "typo_audio_underruns_total", "Output blocks where playback ran out of queued audio and was padded with silence.",
+))
+mic_frames_sent_total = REGISTRY.register(Counter(
+    "typo_mic_frames_sent_total", "Microphone frames appended to the Realtime input audio buffer.",
+))
+mic_frames_dropped_total = REGISTRY.register(Counter(
+    "typo_mic_frames_dropped_total", "Microphone frames lost to input overflow or failed sends.",
+))
+realtime_events_total = REGISTRY.register(Counter(
+    "typo_realtime_events_total", "Realtime websocket events received, by type.", labels=("type",),
+))
+tool_call_seconds = REGISTRY.register(Histogram(
+    "typo_tool_call_seconds", "MCP tool call latency.", labels=("tool", "server"),
+))
+tool_call_errors_total = REGISTRY.register(Counter(
+    "typo_tool_call_errors_total", "MCP tool calls that failed.", labels=("tool", "server"),
+))
+approval_wait_seconds = REGISTRY.register(Histogram(
+    "typo_approval_wait_seconds", "Time spent waiting for the user to approve or reject a tool call.",
+    labels=("decision",), buckets=APPROVAL_BUCKETS,
+))
+event_loop_lag_seconds = REGISTRY.register(Histogram(
+    "typo_event_loop_lag_seconds", "Delay between when an event loop callback was due and when it ran.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+))
+event_loop_lag_max_seconds = REGISTRY.register(Gauge(
+    "typo_event_loop_lag_max_seconds", "Largest event loop lag seen in the last sampling window.",
+))
+
+
+async def monitor_event_loop_lag(
+    interval: float = 0.1, window: float = 10.0, on_lag: Callable[[float], None] | None = None
+) -> None:
+    """Continuously measure asyncio scheduling lag by timing a periodic sleep.
+
+    This is the only event loop heartbeat; other consumers (the profiler) get
+    each measurement through `on_lag` instead of running their own.
+    """
+    loop = asyncio.get_running_loop()
+    window_start = loop.time()
+    window_max = 0.0
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - expected)
+        event_loop_lag_seconds.observe(lag)
+        if on_lag is not None:
+            on_lag(lag)
+        window_max = max(window_max, lag)
+        if loop.time() - window_start >= window:
+            event_loop_lag_max_seconds.set(window_max)
+            window_start = loop.time()
+            window_max = 0.0
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):  # noqa: N802
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # noqa: A002
+        # Keep scrapes out of the terminal
+        pass
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Enable metric recording, serve /metrics from a daemon thread and return the server."""
+    global ENABLED
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    ENABLED = True
+    return server
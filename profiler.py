@@ -0,0 +1,176 @@
+"""Event loop lag and audio callback profiling for `--profile` mode.
+
+The asyncio loop is shared by mic streaming, the Realtime event handler and
+input handling, while PortAudio calls the output callback on its own thread.
+The profiler:
+
+- records how late each tick of the event loop heartbeat
+  (`metrics.monitor_event_loop_lag`) runs,
+- runs a watchdog thread that samples the loop thread's stack whenever the
+  heartbeat is overdue by more than the lag threshold,
+- times every audio output callback against its deadline (one block of audio).
+
+On exit it writes PREFIX.json (summary) and PREFIX.folded (collapsed stacks,
+the input format of flamegraph.pl, speedscope and inferno).
+"""
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from collections import Counter, deque
+
+import metrics
+
+# Samples kept for percentile calculations
+MAX_SAMPLES = 50000
+
+
+def _percentiles(samples, points=(50, 90, 99, 99.9)) -> dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    result = {}
+    for point in points:
+        index = min(len(ordered) - 1, int(round(point / 100 * (len(ordered) - 1))))
+        result[f"p{point:g}"] = ordered[index]
+    return result
+
+
+def _collapse_stack(frame) -> str:
+    """Collapse a frame chain into 'outer;...;inner' for flamegraph tools."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Profiler:
+    """Measures event loop lag and audio callback timing, sampling stacks on stalls."""
+
+    def __init__(self, output_prefix: str = "typo-profile", lag_threshold: float = 0.05,
+                 tick_interval: float = 0.01, sample_interval: float = 0.005):
+        self.output_prefix = output_prefix
+        self.lag_threshold = lag_threshold
+        self.tick_interval = tick_interval
+        self.sample_interval = sample_interval
+
+        self.lag_samples: deque[float] = deque(maxlen=MAX_SAMPLES)
+        self.lag_max = 0.0
+        self.lag_over_threshold = 0
+        self.stalls = 0
+
+        self.callback_samples: deque[float] = deque(maxlen=MAX_SAMPLES)
+        self.callback_count = 0
+        self.callback_max = 0.0
+        self.callback_deadline = 0.0
+        self.callback_missed_deadline = 0
+        self.callback_underflows = 0
+        self.lock = threading.Lock()
+
+        self.stacks: Counter = Counter()
+        self.started = 0.0
+        self._heartbeat = 0.0
+        self._loop_thread_id: int | None = None
+        self._tick_task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        """Start profiling; must be called from the event loop thread."""
+        self.started = time.perf_counter()
+        self._heartbeat = self.started
+        self._loop_thread_id = threading.get_ident()
+        self._tick_task = asyncio.create_task(
+            metrics.monitor_event_loop_lag(self.tick_interval, on_lag=self.record_lag)
+        )
+        self._watchdog = threading.Thread(target=self._watch, name="profiler-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def record_lag(self, lag: float) -> None:
+        """Record one heartbeat tick; called on the event loop by the lag monitor."""
+        self._heartbeat = time.perf_counter()
+        self.lag_samples.append(lag)
+        self.lag_max = max(self.lag_max, lag)
+        if lag > self.lag_threshold:
+            self.lag_over_threshold += 1
+
+    def _watch(self) -> None:
+        in_stall = False
+        while not self._stopping.wait(self.sample_interval):
+            overdue = time.perf_counter() - self._heartbeat - self.tick_interval
+            if overdue <= self.lag_threshold:
+                in_stall = False
+                continue
+            if not in_stall:
+                self.stalls += 1
+                in_stall = True
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self.stacks[_collapse_stack(frame)] += 1
+
+    def record_audio_callback(self, duration: float, deadline: float, underflow: bool) -> None:
+        """Record one audio callback; called from the PortAudio thread."""
+        with self.lock:
+            self.callback_samples.append(duration)
+            self.callback_count += 1
+            self.callback_max = max(self.callback_max, duration)
+            self.callback_deadline = deadline
+            if duration > deadline:
+                self.callback_missed_deadline += 1
+            if underflow:
+                self.callback_underflows += 1
+
+    def summary(self) -> dict:
+        """Profiling results so far."""
+        with self.lock:
+            callback_samples = list(self.callback_samples)
+            audio = {
+                "callbacks": self.callback_count,
+                "deadline_ms": self.callback_deadline * 1000,
+                "max_ms": self.callback_max * 1000,
+                "missed_deadline": self.callback_missed_deadline,
+                "output_underflows": self.callback_underflows,
+                "percentiles_ms": {k: v * 1000 for k, v in _percentiles(callback_samples).items()},
+            }
+            if callback_samples and self.callback_deadline:
+                audio["worst_deadline_usage"] = self.callback_max / self.callback_deadline
+        return {
+            "duration_s": time.perf_counter() - self.started,
+            "event_loop": {
+                "ticks": len(self.lag_samples),
+                "lag_threshold_ms": self.lag_threshold * 1000,
+                "max_lag_ms": self.lag_max * 1000,
+                "ticks_over_threshold": self.lag_over_threshold,
+                "stalls": self.stalls,
+                "stack_samples": sum(self.stacks.values()),
+                "percentiles_ms": {k: v * 1000 for k, v in _percentiles(list(self.lag_samples)).items()},
+            },
+            "audio_callback": audio,
+            "top_stalled_stacks": [
+                {"samples": count, "stack": stack.split(";")[-3:]} for stack, count in self.stacks.most_common(5)
+            ],
+        }
+
+    async def stop(self) -> tuple[str, str]:
+        """Stop profiling and write the summary and folded stacks. Returns the file paths."""
+        self._stopping.set()
+        if self._tick_task:
+            self._tick_task.cancel()
+            await asyncio.gather(self._tick_task, return_exceptions=True)
+        if self._watchdog:
+            self._watchdog.join(1.0)
+
+        summary_path = f"{self.output_prefix}.json"
+        folded_path = f"{self.output_prefix}.folded"
+        with open(summary_path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        with open(folded_path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return summary_path, folded_path
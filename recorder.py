@@ -0,0 +1,138 @@
+"""Append-only session recording for debugging and replay.
+
+Recordings are JSON lines. The first line is a header describing the audio
+format, every following line is one timestamped entry:
+
+    {"t": 1.234, "kind": "mic", "audio": "<base64 pcm16>"}
+    {"t": 1.250, "kind": "speaker", "audio": "<base64 pcm16>"}
+    {"t": 1.300, "kind": "event", "data": {...realtime event...}}
+    {"t": 2.000, "kind": "tool_call", "data": {"name": ..., "arguments": ..., ...}}
+
+`t` is seconds since the recording started. Callers only ever enqueue; all
+serialisation and disk writes happen on a background thread, and entries are
+dropped rather than blocking when the queue is full.
+"""
+from __future__ import annotations
+
+import json
+import time
+import base64
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+RECORDING_VERSION = 1
+QUEUE_SIZE = 4096  # ~80s of 20ms mic frames
+
+
+@dataclass
+class RecordedEntry:
+    """One entry read back from a recording."""
+
+    t: float
+    kind: str
+    audio: bytes | None = None
+    data: Any = None
+
+
+def _to_jsonable(value: Any) -> Any:
+    """Convert Realtime event models and other objects into JSON-friendly data."""
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return value
+
+
+class SessionRecorder:
+    """Records audio, Realtime events and tool calls to disk from a writer thread."""
+
+    def __init__(self, path: str, audio_format: str, sample_rate: int):
+        self.path = path
+        self.queue: queue.Queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = 0
+        self._start = time.monotonic()
+        self._file = open(path, "w", encoding="utf-8")
+        self._write_line({
+            "kind": "header",
+            "version": RECORDING_VERSION,
+            "audio_format": audio_format,
+            "sample_rate": sample_rate,
+            "started_at": time.time(),
+        })
+        self._thread = threading.Thread(target=self._run, name="session-recorder", daemon=True)
+        self._thread.start()
+
+    def _enqueue(self, kind: str, payload: Any) -> None:
+        try:
+            self.queue.put_nowait((time.monotonic() - self._start, kind, payload))
+        except queue.Full:
+            self.dropped += 1
+
+    def record_audio(self, kind: str, pcm: bytes) -> None:
+        """Record a block of pcm16 audio ("mic" or "speaker")."""
+        self._enqueue(kind, pcm)
+
+    def record_event(self, event: Any) -> None:
+        """Record a Realtime API event."""
+        self._enqueue("event", event)
+
+    def record_tool_call(self, name: str, arguments: dict, approved: bool, result: dict | None = None) -> None:
+        """Record a tool call, its approval decision and its result."""
+        self._enqueue("tool_call", {"name": name, "arguments": arguments, "approved": approved, "result": result})
+
+    def _write_line(self, entry: dict) -> None:
+        self._file.write(json.dumps(entry, default=str) + "\n")
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            t, kind, payload = item
+            entry: dict[str, Any] = {"t": round(t, 6), "kind": kind}
+            if isinstance(payload, (bytes, bytearray)):
+                entry["audio"] = base64.b64encode(payload).decode("ascii")
+            else:
+                entry["data"] = _to_jsonable(payload)
+            try:
+                self._write_line(entry)
+            except (TypeError, ValueError):
+                self.dropped += 1
+            # Flush once the backlog is drained so a crash loses little
+            if self.queue.empty():
+                self._file.flush()
+        self._file.flush()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush outstanding entries and stop the writer thread."""
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._file.close()
+
+
+def read_header(path: str) -> dict:
+    """Read the header line of a recording."""
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+    if header.get("kind") != "header":
+        raise ValueError(f"{path} is not a typo recording")
+    return header
+
+
+def load_recording(path: str, kinds: tuple[str, ...] | None = None) -> Iterator[RecordedEntry]:
+    """Iterate over the entries of a recording, optionally filtered by kind."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            kind = entry.get("kind")
+            if kind == "header" or (kinds and kind not in kinds):
+                continue
+            audio = base64.b64decode(entry["audio"]) if "audio" in entry else None
+            yield RecordedEntry(t=entry.get("t", 0.0), kind=kind, audio=audio, data=entry.get("data"))
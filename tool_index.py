@@ -0,0 +1,115 @@
+"""Local lexical index for picking the MCP tools relevant to a user turn.
+
+Large MCP catalogs make every `session.update` and model turn heavier, so
+instead of sending every tool we score tools against the user's transcript
+with BM25 over their names, descriptions and parameter names, and only send
+the best matches plus a `find_tools` meta-tool the model can use to fetch more.
+"""
+from __future__ import annotations
+
+import re
+import math
+from collections import Counter
+
+FIND_TOOLS_NAME = "find_tools"
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can could do for from get has have i in into is it me my of on or please "
+    "should so that the their them then there this to up use want was we what when which will with would "
+    "you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase terms, breaking up snake_case and camelCase names."""
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+def _tool_text(tool: dict) -> str:
+    """Searchable text for a tool in OpenAI function format."""
+    parts = [tool.get("name", ""), tool.get("name", ""), tool.get("description", "")]
+    properties = (tool.get("parameters") or {}).get("properties") or {}
+    for name, schema in properties.items():
+        parts.append(name)
+        if isinstance(schema, dict):
+            parts.append(str(schema.get("description", "")))
+    return " ".join(parts)
+
+
+def find_tools_definition() -> dict:
+    """The meta-tool that lets the model search for tools it wasn't given."""
+    return {
+        "type": "function",
+        "name": FIND_TOOLS_NAME,
+        "description": (
+            "Search the full catalog of available tools. Only a subset of tools is loaded at a time; "
+            "call this when none of the loaded tools fit the request. Matching tools are loaded for you to call next."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "What the tool should do, in a few words"},
+            },
+            "required": ["query"],
+        },
+    }
+
+
+class ToolIndex:
+    """BM25 index over a list of tools in OpenAI function format."""
+
+    def __init__(self, tools: list[dict]):
+        self.tools = tools
+        self.term_counts: list[Counter] = []
+        self.lengths: list[int] = []
+        document_frequency: Counter = Counter()
+
+        for tool in tools:
+            terms = Counter(tokenize(_tool_text(tool)))
+            self.term_counts.append(terms)
+            self.lengths.append(sum(terms.values()))
+            document_frequency.update(terms.keys())
+
+        count = len(tools)
+        self.average_length = (sum(self.lengths) / count) if count else 0.0
+        self.idf = {
+            term: math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def scores(self, query: str) -> list[float]:
+        """BM25 score of every tool against the query."""
+        query_terms = set(tokenize(query))
+        scores = []
+        for terms, length in zip(self.term_counts, self.lengths):
+            score = 0.0
+            norm = K1 * (1 - B + B * length / self.average_length) if self.average_length else K1
+            for term in query_terms:
+                frequency = terms.get(term)
+                if frequency:
+                    score += self.idf[term] * frequency * (K1 + 1) / (frequency + norm)
+            scores.append(score)
+        return scores
+
+    def search(self, query: str, limit: int) -> list[dict]:
+        """Return up to `limit` tools matching the query, best first."""
+        scores = self.scores(query)
+        ranked = sorted(range(len(self.tools)), key=lambda i: scores[i], reverse=True)
+        return [self.tools[i] for i in ranked[:limit] if scores[i] > 0]
+
+    def select(self, query: str, limit: int) -> list[dict]:
+        """Pick `limit` tools for a turn, topping up with catalog order when few tools match."""
+        selected = self.search(query, limit)
+        names = {tool["name"] for tool in selected}
+        for tool in self.tools:
+            if len(selected) >= limit:
+                break
+            if tool["name"] not in names:
+                selected.append(tool)
+                names.add(tool["name"])
+        return selected
@@ -0,0 +1,269 @@
+"""Compaction of MCP tool schemas before they are sent to the Realtime API.
+
+MCP servers often ship JSON schemas generated from code, with `$defs`,
+titles, defaults and long descriptions the model doesn't need. Every byte is
+paid for in `session.update` and in each model turn, so we inline or dedupe
+`$ref`s, drop non-essential keywords and clamp description lengths.
+
+Per-server settings can be given in mcp.json under a `toolSchema` key:
+
+    "my-server": {
+      "command": "...",
+      "toolSchema": {"compact": true, "maxDescriptionLength": 300, "maxParameterDescriptionLength": 120}
+    }
+"""
+from __future__ import annotations
+
+import copy
+import json
+from collections import Counter
+from typing import Any, Iterator
+from urllib.parse import unquote
+
+CONFIG_KEY = "toolSchema"
+
+DEFAULT_OPTIONS = {
+    "compact": True,
+    "maxDescriptionLength": 400,
+    "maxParameterDescriptionLength": 150,
+}
+
+# Keywords that only document the schema and don't constrain the arguments
+STRIPPED_KEYWORDS = frozenset({
+    "title", "default", "examples", "example", "$schema", "$id", "$comment",
+    "deprecated", "readOnly", "writeOnly", "markdownDescription",
+})
+
+# Keywords whose value is a map of name -> schema
+_SCHEMA_MAPS = ("properties", "patternProperties", "dependentSchemas")
+# Keywords whose value is a schema or a list of schemas
+_SCHEMA_VALUES = (
+    "additionalProperties", "not", "if", "then", "else", "contains", "propertyNames",
+    "unevaluatedProperties", "unevaluatedItems", "additionalItems", "contentSchema",
+)
+_SCHEMA_LISTS = ("anyOf", "oneOf", "allOf", "prefixItems")
+_DEFINITION_KEYWORDS = ("$defs", "definitions")
+_MISSING = object()
+
+
+def estimate_tokens(num_bytes: int) -> int:
+    """Rough token estimate for JSON payloads (~4 bytes per token)."""
+    return (num_bytes + 3) // 4
+
+
+def _json_size(value: Any) -> int:
+    return len(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def payload_size(tools: list[dict]) -> int:
+    """Size in bytes of the tools list as sent in session.update."""
+    return _json_size(tools)
+
+
+def clamp_description(text: str, limit: int) -> str:
+    """Shorten text to at most `limit` characters, preferring a sentence or word boundary."""
+    text = " ".join(text.split())
+    if not limit or len(text) <= limit:
+        return text
+    cut = text[:limit - 1]
+    sentence_end = cut.rfind(". ")
+    if sentence_end >= limit // 2:
+        return cut[:sentence_end + 1]
+    word_end = cut.rfind(" ")
+    if word_end >= limit // 2:
+        cut = cut[:word_end]
+    return cut.rstrip(",;:") + "…"
+
+
+def _pointer_parts(ref: str) -> list[str] | None:
+    """Split a local JSON pointer ref ("#/a/b") into unescaped parts, or None if not local."""
+    if not ref.startswith("#"):
+        return None
+    pointer = unquote(ref[1:])
+    if not pointer:
+        return []
+    if not pointer.startswith("/"):
+        return None
+    return [part.replace("~1", "/").replace("~0", "~") for part in pointer[1:].split("/")]
+
+
+def _resolve_ref(root: dict, ref: str) -> Any:
+    """Resolve a local `$ref` against the root schema, or return _MISSING."""
+    parts = _pointer_parts(ref)
+    if parts is None:
+        return _MISSING
+    return _resolve_parts(root, parts)
+
+
+def _resolve_parts(root: Any, parts: list[str]) -> Any:
+    """Follow unescaped pointer parts from `root`, or return _MISSING."""
+    target: Any = root
+    for part in parts:
+        if isinstance(target, dict) and part in target:
+            target = target[part]
+        elif isinstance(target, list) and part.isdigit() and int(part) < len(target):
+            target = target[int(part)]
+        else:
+            return _MISSING
+    return target
+
+
+def _find_refs(value: Any) -> Iterator[str]:
+    """Every `$ref` string anywhere in a schema."""
+    if isinstance(value, dict):
+        ref = value.get("$ref")
+        if isinstance(ref, str):
+            yield ref
+        for sub in value.values():
+            yield from _find_refs(sub)
+    elif isinstance(value, list):
+        for sub in value:
+            yield from _find_refs(sub)
+
+
+def _is_definition_ref(ref: str) -> bool:
+    """Whether a ref points at an entry of a `$defs`/`definitions` block."""
+    parts = _pointer_parts(ref)
+    return bool(parts) and len(parts) >= 2 and parts[-2] in _DEFINITION_KEYWORDS
+
+
+def _count_refs(root: dict) -> Counter:
+    """How many times each ref would appear if only definition refs were left in place."""
+    uses: Counter = Counter()
+
+    def visit(value: Any, resolving: tuple[str, ...]) -> None:
+        if isinstance(value, dict):
+            ref = value.get("$ref")
+            if isinstance(ref, str):
+                uses[ref] += 1
+                # A definition body is counted once; other targets are inlined at every use
+                if ref not in resolving and (uses[ref] == 1 or not _is_definition_ref(ref)):
+                    target = _resolve_ref(root, ref)
+                    if isinstance(target, dict):
+                        visit(target, resolving + (ref,))
+            for key, sub in value.items():
+                if key != "$ref" and key not in _DEFINITION_KEYWORDS:
+                    visit(sub, resolving)
+        elif isinstance(value, list):
+            for sub in value:
+                visit(sub, resolving)
+
+    visit(root, ("#",))
+    return uses
+
+
+class _Compactor:
+    """Compacts one schema, deciding per definition whether to inline it or keep it shared."""
+
+    def __init__(self, root: dict, max_description: int):
+        self.root = root
+        self.max_description = max_description
+        self.uses = _count_refs(root)
+        self.kept: dict[str, bool] = {}
+        self.definitions: dict[str, dict] = {}
+
+    def keep_ref(self, ref: str) -> bool:
+        """Whether a ref stays a `$ref` to its (compacted) definition instead of being inlined."""
+        if ref not in self.kept:
+            if self.uses[ref] < 2 or not _is_definition_ref(ref) or not isinstance(_resolve_ref(self.root, ref), dict):
+                return False
+            # Refs back into the definition while it is compacted stay refs
+            self.kept[ref] = True
+            # Shared definitions are still inlined when a copy is no bigger than the ref itself
+            self.kept[ref] = _json_size(self.definition(ref)) > _json_size({"$ref": ref})
+        return self.kept[ref]
+
+    def definition(self, ref: str) -> dict:
+        """The compacted body of a kept definition."""
+        if ref not in self.definitions:
+            self.definitions[ref] = self.compact(_resolve_ref(self.root, ref), (ref,))
+        return self.definitions[ref]
+
+    def compact(self, schema: Any, resolving: tuple[str, ...]) -> Any:
+        if not isinstance(schema, dict):
+            return schema
+
+        ref = schema.get("$ref")
+        if isinstance(ref, str) and ref not in resolving and not self.keep_ref(ref):
+            target = _resolve_ref(self.root, ref)
+            if isinstance(target, dict):
+                siblings = {key: value for key, value in schema.items() if key != "$ref"}
+                merged = {**target, **siblings}
+                return self.compact(merged, resolving + (ref,))
+        # Shared, recursive or unresolvable refs are left in place; compact_schema adds back their definitions
+
+        compacted: dict[str, Any] = {}
+        for key, value in schema.items():
+            if key in STRIPPED_KEYWORDS or key in _DEFINITION_KEYWORDS:
+                continue
+            if key == "description" and isinstance(value, str):
+                value = clamp_description(value, self.max_description)
+                if value:
+                    compacted[key] = value
+            elif key in _SCHEMA_MAPS and isinstance(value, dict):
+                compacted[key] = {name: self.compact(sub, resolving) for name, sub in value.items()}
+            elif key == "dependencies" and isinstance(value, dict):
+                # Values are either schemas or lists of property names
+                compacted[key] = {name: self.compact(sub, resolving) for name, sub in value.items()}
+            elif key in _SCHEMA_VALUES and isinstance(value, dict):
+                compacted[key] = self.compact(value, resolving)
+            elif key == "items" and isinstance(value, dict):
+                compacted[key] = self.compact(value, resolving)
+            elif (key in _SCHEMA_LISTS or key == "items") and isinstance(value, list):
+                compacted[key] = [self.compact(sub, resolving) for sub in value]
+            else:
+                compacted[key] = value
+        return compacted
+
+
+def compact_schema(schema: dict, max_description: int = 150) -> dict:
+    """Inline or dedupe `$ref`s, strip non-essential keywords and clamp parameter descriptions.
+
+    Definitions used once are inlined. Shared and recursive ones are compacted
+    once and kept where their refs point, nested `$defs` blocks included. If a
+    ref would be left dangling, or the result is bigger, the schema is returned
+    unchanged.
+    """
+    compactor = _Compactor(schema, max_description)
+    # Refs to the root stay refs, they point at the compacted root
+    compacted = compactor.compact(schema, ("#",))
+
+    pending = list(_find_refs(compacted))
+    placed: set[str] = set()
+    while pending:
+        ref = pending.pop()
+        if ref in placed or not compactor.kept.get(ref):
+            continue
+        parts = _pointer_parts(ref) or []
+        container = _resolve_parts(compacted, parts[:-2])
+        if not isinstance(container, dict):
+            return schema
+        definition = compactor.definition(ref)
+        container.setdefault(parts[-2], {})[parts[-1]] = definition
+        placed.add(ref)
+        pending.extend(_find_refs(definition))
+
+    for ref in _find_refs(compacted):
+        if _pointer_parts(ref) is not None and _resolve_ref(compacted, ref) is _MISSING:
+            return schema
+    return compacted if _json_size(compacted) <= _json_size(schema) else schema
+
+
+def compact_tool(tool: dict, options: dict | None = None) -> dict:
+    """Compact one tool in OpenAI function format according to its server's options."""
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    if not options["compact"]:
+        return tool
+    compacted = copy.copy(tool)
+    compacted["description"] = clamp_description(tool.get("description", ""), options["maxDescriptionLength"])
+    compacted["parameters"] = compact_schema(tool.get("parameters") or {}, options["maxParameterDescriptionLength"])
+    return compacted
+
+
+def pop_server_options(config: dict) -> dict[str, dict]:
+    """Remove typo's per-server schema options from an mcp.json config and return them by server name."""
+    options = {}
+    for name, server in config.get("mcpServers", {}).items():
+        if isinstance(server, dict) and CONFIG_KEY in server:
+            options[name] = server.pop(CONFIG_KEY)
+    return options
@@ -14,18 +14,26 @@
 #
 # ///
 from __future__ import annotations
+import argparse
 import base64
 import asyncio
 import json
 import sys
+from contextlib import AsyncExitStack
 from typing import Any, cast
 from fastmcp import Client
 import os
-from audio_util import CHANNELS, SAMPLE_RATE, AudioPlayerAsync
+import time
+import numpy as np
+import metrics
+from profiler import Profiler
+from recorder import SessionRecorder, load_recording, read_header
+from tool_index import FIND_TOOLS_NAME, ToolIndex, find_tools_definition
+from tool_schema import compact_tool, estimate_tokens, payload_size, pop_server_options
+from audio_util import AUDIO_FORMATS, CHANNELS, AudioCodec, AudioPlayerAsync
 from openai import AsyncOpenAI
 from openai.types.beta.realtime.session import Session
 from openai.resources.beta.realtime.realtime import AsyncRealtimeConnection
-from pynput import keyboard
 import threading
 
 # Global log level setting
@@ -74,11 +82,17 @@ class MCPClient:
 
     def __init__(self):
         self.available_tools: list[dict] = []
-        self.client = None
-
-    async def connect_to_mcp_servers(self):
-        """Connect to MCP servers defined in configuration."""
-        # Load configuration from mcp.json file
+        self.server_names: list[str] = []
+        # Each server gets its own FastMCP client so it can be started and stopped on its own
+        self.clients: dict[str, Client] = {}
+        self.server_configs: dict[str, dict] = {}
+        self.server_options: dict[str, dict] = {}
+        self.server_tools: dict[str, list[dict]] = {}  # uncompacted tools as reported by each server
+        self.tool_routes: dict[str, tuple[str, str]] = {}  # exposed tool name -> (server name, MCP tool name)
+        self._exit_stacks: dict[str, AsyncExitStack] = {}
+
+    def load_config(self) -> dict:
+        """Load configuration from mcp.json file."""
         try:
             with open("mcp.json", "r") as f:
                 config = json.load(f)
@@ -90,53 +104,159 @@ class MCPClient:
         except json.JSONDecodeError as e:
             error(f"mcp.json parsing error: {e}")
             raise
+        return config
 
+    async def connect_to_mcp_servers(self):
+        """Connect to MCP servers defined in configuration."""
+        await self.apply_config(self.load_config())
+        debug("loaded mcp.json")
+
+    async def apply_config(self, config: dict) -> tuple[list[str], list[str], list[str], list[str]]:
+        """Start and stop servers so they match the config, leaving unchanged servers running.
+
+        Servers whose only change is their `toolSchema` options keep running and
+        just have their tools recompacted. Returns the names of the added, removed,
+        changed and recompacted servers.
+        """
+        # typo's own per-server options aren't part of the MCP config format
+        options = pop_server_options(config)
+        servers = config.get("mcpServers", {})
+
+        added = [name for name in servers if name not in self.server_configs]
+        removed = [name for name in self.server_configs if name not in servers]
+        changed = [name for name in servers if name in self.server_configs and servers[name] != self.server_configs[name]]
+        recompacted = [
+            name for name in servers
+            if name in self.server_configs and name not in changed
+            and options.get(name) != self.server_options.get(name)
+        ]
+
+        for name in removed + changed:
+            await self.stop_server(name)
+            self.server_configs.pop(name, None)
+            self.server_options.pop(name, None)
+        for name in recompacted:
+            if name in options:
+                self.server_options[name] = options[name]
+            else:
+                self.server_options.pop(name, None)
+        for name in changed + added:
+            try:
+                await self.start_server(name, servers[name])
+            except Exception as e:
+                error(f"failed to start MCP server {name}: {e}")
+                continue
+            # Only remember servers that started, so saving mcp.json again retries the others
+            self.server_configs[name] = servers[name]
+            if name in options:
+                self.server_options[name] = options[name]
+
+        self.server_names = [name for name in servers if name in self.server_configs]
+        self.rebuild_tools()
+        return added, removed, changed, recompacted
+
+    async def start_server(self, name: str, server_config: dict) -> None:
+        """Start one MCP server, keep it connected and fetch its tools."""
         # Create and validate client with FastMCP
         try:
             current_dir = os.getcwd()
-            self.client = Client(
-                config,
+            client = Client(
+                {"mcpServers": {name: server_config}},
                 roots=[f"file://{current_dir}/"]
             )
-            debug("loaded mcp.json")
         except Exception as e:
-            error(f"mcp.json validation failed: {e}")
+            error(f"mcp.json validation failed for {name}: {e}")
             raise
 
-        # Connect and get available tools
-        async with self.client as client:
+        # Hold the connection open so the server process stays warm between tool calls
+        stack = AsyncExitStack()
+        try:
+            await stack.enter_async_context(client)
             tools = await client.list_tools()
-            self.available_tools = []
-
-            for tool in tools:
-                # Convert MCP tool to OpenAI function format
-                openai_tool = {
-                    "type": "function",
-                    "name": tool.name,
-                    "description": tool.description or f"MCP tool: {tool.name}",
-                    "parameters": tool.inputSchema or {"type": "object", "properties": {}, "required": []}
-                }
-                self.available_tools.append(openai_tool)
+        except BaseException:
+            await stack.aclose()
+            raise
+
+        self.clients[name] = client
+        self._exit_stacks[name] = stack
+        self.server_tools[name] = [
+            # Convert MCP tool to OpenAI function format
+            {
+                "type": "function",
+                "name": tool.name,
+                "description": tool.description or f"MCP tool: {tool.name}",
+                "parameters": tool.inputSchema or {"type": "object", "properties": {}, "required": []}
+            }
+            for tool in tools
+        ]
+        debug(f"started MCP server {name} with {len(tools)} tools")
+
+    async def stop_server(self, name: str) -> None:
+        """Disconnect from one MCP server and forget its tools."""
+        self.clients.pop(name, None)
+        self.server_tools.pop(name, None)
+        stack = self._exit_stacks.pop(name, None)
+        if stack:
+            try:
+                await stack.aclose()
+            except Exception as e:
+                error(f"error stopping MCP server {name}: {e}")
+        debug(f"stopped MCP server {name}")
+
+    def rebuild_tools(self) -> None:
+        """Rebuild the exposed tool list from every running server's tools."""
+        # With several servers each tool name is prefixed with its server name
+        prefix = len(self.server_names) > 1
+        self.available_tools = []
+        self.tool_routes = {}
+        original_tools = []
+
+        for server_name in self.server_names:
+            for tool in self.server_tools.get(server_name, []):
+                exposed_name = f"{server_name}_{tool['name']}" if prefix else tool["name"]
+                openai_tool = {**tool, "name": exposed_name}
+                self.tool_routes[exposed_name] = (server_name, tool["name"])
+                original_tools.append(openai_tool)
+                self.available_tools.append(compact_tool(openai_tool, self.server_options.get(server_name)))
+
+        if self.available_tools:
+            original_size = payload_size(original_tools)
+            compacted_size = payload_size(self.available_tools)
+            info(
+                f"tool schemas compacted from {original_size} to {compacted_size} bytes "
+                f"(~{estimate_tokens(original_size)} to ~{estimate_tokens(compacted_size)} tokens)"
+            )
+
+    def server_for_tool(self, tool_name: str) -> str:
+        """Get the name of the MCP server that provides a tool."""
+        return self.tool_routes.get(tool_name, ("unknown", tool_name))[0]
 
     async def call_tool(self, tool_name: str, arguments: dict) -> dict:
         """Execute a tool call on the MCP server."""
-        if not self.client:
+        if not self.clients:
             return {"error": "No MCP server configured"}
 
+        server_name, mcp_tool_name = self.tool_routes.get(tool_name, ("unknown", tool_name))
+        started = time.perf_counter()
         try:
-            async with self.client as client:
-                result = await client.call_tool(tool_name, arguments)
+            if server_name not in self.clients:
+                raise RuntimeError(f"unknown tool: {tool_name}")
+            async with self.clients[server_name] as client:
+                result = await client.call_tool(mcp_tool_name, arguments)
                 return {
                     "success": True,
                     "content": result.content if hasattr(result, 'content') else [{"type": "text", "text": str(result)}],
                     "isError": False
                 }
         except Exception as e:
+            metrics.tool_call_errors_total.inc(tool=tool_name, server=server_name)
             return {
                 "success": False,
                 "error": str(e),
                 "isError": True
             }
+        finally:
+            metrics.tool_call_seconds.observe(time.perf_counter() - started, tool=tool_name, server=server_name)
 
     def serialize_mcp_result(self, result: dict) -> dict:
         """Convert MCP result to JSON-serializable format."""
@@ -195,9 +315,101 @@ class MCPClient:
         print()  # Add blank line for spacing
 
     async def close(self):
-        """Close the MCP client connection."""
-        # FastMCP Client uses async context managers, no explicit close needed
-        pass
+        """Close the MCP server connections."""
+        for name in list(self._exit_stacks):
+            await self.stop_server(name)
+
+
+class PendingApproval:
+    """A tool call waiting for the user to approve or reject it."""
+
+    def __init__(self, request_id: int, tool_name: str, args: dict, future: asyncio.Future):
+        self.request_id = request_id
+        self.tool_name = tool_name
+        self.args = args
+        self.future = future
+        self.decision: str | None = None  # "approved", "rejected", "timed_out" or "cancelled"
+        self.started = time.perf_counter()
+        self.timeout_handle: asyncio.TimerHandle | None = None
+
+
+class ToolApprovalQueue:
+    """Pending tool approvals, resolved on the event loop.
+
+    Several tool calls can wait for approval at once. Methods without the
+    `_threadsafe` suffix must run on the event loop; the keyboard listener
+    thread uses the `_threadsafe` variants, which marshal onto the loop with
+    `call_soon_threadsafe` so asyncio futures are never touched off-loop.
+    """
+
+    def __init__(self, timeout: float | None = 120.0):
+        self.timeout = timeout
+        self.pending: dict[int, PendingApproval] = {}
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._next_id = 1
+
+    def request(self, tool_name: str, args: dict) -> PendingApproval:
+        """Queue a tool call for approval. Await `.future` for the decision."""
+        self.loop = asyncio.get_running_loop()
+        approval = PendingApproval(self._next_id, tool_name, args, self.loop.create_future())
+        self._next_id += 1
+        self.pending[approval.request_id] = approval
+        if self.timeout:
+            approval.timeout_handle = self.loop.call_later(
+                self.timeout, self._resolve, approval.request_id, False, "timed_out"
+            )
+        return approval
+
+    def _resolve(self, request_id: int, approved: bool, decision: str) -> bool:
+        approval = self.pending.pop(request_id, None)
+        if approval is None or approval.future.done():
+            return False
+        if approval.timeout_handle:
+            approval.timeout_handle.cancel()
+        approval.decision = decision
+        approval.future.set_result(approved)
+        metrics.approval_wait_seconds.observe(time.perf_counter() - approval.started, decision=decision)
+        if decision == "timed_out":
+            info(f"tool call #{request_id} ({approval.tool_name}) timed out waiting for approval, rejecting")
+        return True
+
+    def resolve(self, request_id: int, approved: bool) -> bool:
+        """Approve or reject one pending tool call by id."""
+        return self._resolve(request_id, approved, "approved" if approved else "rejected")
+
+    def resolve_oldest(self, approved: bool) -> PendingApproval | None:
+        """Approve or reject the longest-waiting tool call."""
+        for request_id, approval in list(self.pending.items()):
+            if self.resolve(request_id, approved):
+                return approval
+        return None
+
+    def resolve_all(self, approved: bool) -> int:
+        """Approve or reject every pending tool call."""
+        return sum(self.resolve(request_id, approved) for request_id in list(self.pending))
+
+    def resolve_oldest_threadsafe(self, approved: bool) -> None:
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._announce_oldest, approved)
+
+    def resolve_all_threadsafe(self, approved: bool) -> None:
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._announce_all, approved)
+
+    def _announce_oldest(self, approved: bool) -> None:
+        approval = self.resolve_oldest(approved)
+        if approval:
+            info(f"tool call #{approval.request_id} ({approval.tool_name}) {'approved' if approved else 'rejected'}")
+
+    def _announce_all(self, approved: bool) -> None:
+        count = self.resolve_all(approved)
+        if count:
+            info(f"{count} tool calls {'approved' if approved else 'rejected'}")
+
+    def cancel_all(self) -> None:
+        """Reject everything still pending, e.g. on shutdown."""
+        for request_id in list(self.pending):
+            self._resolve(request_id, False, "cancelled")
 
 
 class GlobalKeyboardListener:
@@ -207,16 +419,22 @@ class GlobalKeyboardListener:
         self.app = app
         self.listener = None
         self.running = False
+        self.shift_pressed = False
+        self.keyboard = None  # pynput.keyboard, imported in start()
 
     def start(self):
         """Start the global keyboard listener in a separate thread."""
         if self.running:
             return
 
+        # pynput needs a display at import time, so only load it when the listener is used
+        from pynput import keyboard
+        self.keyboard = keyboard
+
         self.running = True
-        self.listener = keyboard.Listener(on_press=self.on_key_press)
+        self.listener = keyboard.Listener(on_press=self.on_key_press, on_release=self.on_key_release)
         self.listener.start()
-        debug("global keyboard listener started (Right Cmd=approve, Right Option=reject)")
+        debug("global keyboard listener started (Right Cmd=approve, Right Option=reject, add Shift for all)")
 
     def stop(self):
         """Stop the global keyboard listener."""
@@ -226,25 +444,48 @@ class GlobalKeyboardListener:
             debug("global keyboard listener stopped")
 
     def on_key_press(self, key):
-        """Handle key press events."""
+        """Handle key press events (runs on the pynput thread)."""
+        keyboard = self.keyboard
         try:
-            if not self.app.pending_tool_approval:
+            if key in (keyboard.Key.shift, keyboard.Key.shift_l, keyboard.Key.shift_r):
+                self.shift_pressed = True
+                return
+
+            approvals = self.app.approvals
+            if not approvals.pending:
                 return
 
-            if key == keyboard.Key.cmd_r:
-                # Right Command = Approve
-                self.app.approve_pending_tool()
-            elif key == keyboard.Key.alt_r:
-                # Right Option/Alt = Reject
-                self.app.reject_pending_tool()
+            if key in (keyboard.Key.cmd_r, keyboard.Key.alt_r):
+                # Right Command = Approve, Right Option/Alt = Reject
+                approved = key == keyboard.Key.cmd_r
+                if self.shift_pressed:
+                    approvals.resolve_all_threadsafe(approved)
+                else:
+                    approvals.resolve_oldest_threadsafe(approved)
 
         except Exception as e:
             debug(f"keyboard listener error: {e}")
 
+    def on_key_release(self, key):
+        """Track Shift so it can modify the approval keys."""
+        keyboard = self.keyboard
+        if key in (keyboard.Key.shift, keyboard.Key.shift_l, keyboard.Key.shift_r):
+            self.shift_pressed = False
+
 
 class RealtimeApp:
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        audio_format: str = "pcm16",
+        metrics_port: int | None = None,
+        record_path: str | None = None,
+        replay_path: str | None = None,
+        max_tools: int = 20,
+        approval_timeout: float | None = 120.0,
+        profile_prefix: str | None = None,
+        headless: bool = False,
+    ) -> None:
         self.connection = None
         self.session = None
 
@@ -256,15 +497,35 @@ class RealtimeApp:
             error(f"failed to initialize OpenAI client: {e}")
             raise
 
-        self.audio_player = AudioPlayerAsync()
+        self.codec = AudioCodec(audio_format)
+        self.audio_player = AudioPlayerAsync(self.codec, headless=headless)
         self.last_audio_item_id = None
         self.should_send_audio = asyncio.Event()
         self.connected = asyncio.Event()
+        self.session_configured = asyncio.Event()
         self.mcp_client = MCPClient()
         self.is_recording = False
         self.response_started = False
-        self.pending_tool_approval = None  # (tool_name, args, future)
+        self.approvals = ToolApprovalQueue(timeout=approval_timeout)
+        self.profiler = Profiler(profile_prefix) if profile_prefix else None
+        self.audio_player.profiler = self.profiler
+        self.tool_tasks: set[asyncio.Task] = set()
         self.keyboard_listener = GlobalKeyboardListener(self)
+        self.metrics_port = metrics_port
+        self.metrics_server = None
+        self.replay_path = replay_path
+        self.recorder = None
+        if record_path:
+            self.recorder = SessionRecorder(record_path, self.codec.name, self.codec.sample_rate)
+            self.audio_player.recorder = self.recorder
+            debug(f"recording session to {record_path}")
+
+        # Relevance-based tool selection, only used when the catalog exceeds max_tools
+        self.max_tools = max_tools
+        self.tool_index = None
+        self.active_tool_names: list[str] = []
+        self.found_tools: list[dict] = []  # loaded by find_tools during the current turn
+        self.last_transcript = ""
 
 
     async def start(self) -> None:
@@ -279,16 +540,40 @@ class RealtimeApp:
         info("typo is here to do your bidding")
         print("" + "="*34)
 
+        if self.codec.name != "pcm16":
+            info(self.codec.bandwidth_summary())
+
         # Start keyboard listener for tool approvals
         self.keyboard_listener.start()
 
+        if self.profiler:
+            self.profiler.start()
+            info(f"profiling event loop lag and audio callbacks (stacks sampled above {self.profiler.lag_threshold * 1000:.0f}ms lag)")
+
+        # Expose metrics on localhost if requested
+        if self.metrics_port is not None:
+            try:
+                self.metrics_server = metrics.start_metrics_server(self.metrics_port)
+                # The profiler runs the lag monitor itself, don't start a second heartbeat
+                if not self.profiler:
+                    self.lag_task = asyncio.create_task(metrics.monitor_event_loop_lag())
+                info(f"metrics available at http://127.0.0.1:{self.metrics_port}/metrics")
+            except OSError as e:
+                error(f"failed to start metrics server on port {self.metrics_port}: {e}")
+
         # Start background tasks and keep references
         self.realtime_task = asyncio.create_task(self.handle_realtime_connection())
-        self.audio_task = asyncio.create_task(self.send_mic_audio())
+        if self.replay_path:
+            self.audio_task = asyncio.create_task(self.send_replay_audio())
+        else:
+            self.audio_task = asyncio.create_task(self.send_mic_audio())
 
         # Initialize MCP first, then start input handling
         await self.initialize_mcp()
 
+        # Pick up edits to system_prompt.md and mcp.json without restarting
+        self.watch_task = asyncio.create_task(self.watch_config_files())
+
         try:
             # Handle user input (after MCP is ready)
             await self.handle_input()
@@ -306,10 +591,21 @@ class RealtimeApp:
             self.realtime_task.cancel()
         if hasattr(self, 'audio_task'):
             self.audio_task.cancel()
+        if hasattr(self, 'lag_task'):
+            self.lag_task.cancel()
+        if hasattr(self, 'watch_task'):
+            self.watch_task.cancel()
+        for task in self.tool_tasks:
+            task.cancel()
+        self.approvals.cancel_all()
 
         # Stop keyboard listener
         self.keyboard_listener.stop()
 
+        # Stop metrics server
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+
         # Close MCP client
         await self.mcp_client.close()
 
@@ -319,10 +615,41 @@ class RealtimeApp:
             tasks.append(self.realtime_task)
         if hasattr(self, 'audio_task'):
             tasks.append(self.audio_task)
+        if hasattr(self, 'lag_task'):
+            tasks.append(self.lag_task)
+        if hasattr(self, 'watch_task'):
+            tasks.append(self.watch_task)
+        tasks.extend(self.tool_tasks)
 
         if tasks:
             await asyncio.gather(*tasks, return_exceptions=True)
 
+        # Write the profile
+        if self.profiler:
+            self.audio_player.profiler = None
+            summary_path, folded_path = await self.profiler.stop()
+            summary = self.profiler.summary()
+            event_loop = summary["event_loop"]
+            audio = summary["audio_callback"]
+            info(
+                f"event loop: max lag {event_loop['max_lag_ms']:.1f}ms, "
+                f"{event_loop['ticks_over_threshold']} ticks over {event_loop['lag_threshold_ms']:.0f}ms, "
+                f"{event_loop['stalls']} stalls sampled"
+            )
+            info(
+                f"audio callback: {audio['callbacks']} calls, max {audio['max_ms']:.2f}ms of {audio['deadline_ms']:.0f}ms deadline, "
+                f"{audio['missed_deadline']} missed, {audio['output_underflows']} underflows"
+            )
+            info(f"profile written to {summary_path} and {folded_path}")
+
+        # Flush the session recording
+        if self.recorder:
+            self.audio_player.recorder = None
+            self.recorder.close()
+            if self.recorder.dropped:
+                error(f"session recorder dropped {self.recorder.dropped} entries")
+            info(f"session recorded to {self.recorder.path}")
+
     async def initialize_mcp(self) -> None:
         """Initialize MCP client connection."""
         try:
@@ -348,201 +675,380 @@ class RealtimeApp:
                     wait_count += 1
 
                 # Configure session with MCP tools
-                tools = self.mcp_client.available_tools
-                debug(f"configuring session with {len(tools)} tools")
+                session_config: dict[str, Any] = {
+                    "input_audio_format": self.codec.name,
+                    "output_audio_format": self.codec.name,
+                    "tool_choice": "auto",
+                    "instructions": load_system_prompt()
+                }
+                session_config.update(self.session_tools_config())
+                debug(f"configuring session with {len(session_config['tools'])} tools")
 
                 try:
-                    await conn.session.update(session={
-                        "turn_detection": {"type": "server_vad"},
-                        "tools": tools,
-                        "tool_choice": "auto",
-                        "instructions": load_system_prompt()
-                    })
+                    await conn.session.update(session=session_config)
                     debug("session configuration successful")
+                    self.session_configured.set()
                 except Exception as e:
                     error(f"session configuration failed: {e}")
                     raise
 
-                acc_items: dict[str, Any] = {}
                 debug("starting event loop...")
 
                 async for event in conn:
-                    # debug(f"received event: {event.type}")
+                    await self.handle_event(event)
+        except asyncio.CancelledError:
+            # Task was cancelled, exit gracefully
+            pass
+        except Exception as e:
+            error(f"realtime connection error: {e}")
 
-                    if event.type == "session.created":
-                        debug(f"session created: {event.session.id}")
-                        self.session = event.session
-                        continue
+    async def handle_event(self, event: Any) -> None:
+        """Dispatch one Realtime API event."""
+        # debug(f"received event: {event.type}")
+        metrics.realtime_events_total.inc(type=event.type)
+        if self.recorder:
+            self.recorder.record_event(event)
 
-                    if event.type == "session.updated":
-                        debug("session updated successfully")
-                        self.session = event.session
-                        continue
+        if event.type == "session.created":
+            debug(f"session created: {event.session.id}")
+            self.session = event.session
+            return
 
-                    if event.type == "error":
-                        error(f"OpenAI API error: {getattr(event, 'error', 'unknown error')}")
-                        if hasattr(event, 'error') and hasattr(event.error, 'message'):
-                            error(f"error details: {event.error.message}")
-                        continue
+        if event.type == "session.updated":
+            debug("session updated successfully")
+            self.session = event.session
+            return
 
-                    if event.type == "response.created":
-                        response_id = getattr(event.response, 'id', 'unknown') if hasattr(event, 'response') else 'unknown'
-                        debug(f"response created: {response_id}")
-                        continue
+        if event.type == "error":
+            error(f"OpenAI API error: {getattr(event, 'error', 'unknown error')}")
+            if hasattr(event, 'error') and hasattr(event.error, 'message'):
+                error(f"error details: {event.error.message}")
+            return
 
-                    if event.type == "response.audio.delta":
-                        if event.item_id != self.last_audio_item_id:
-                            # debug(f"new audio item: {event.item_id}")
-                            self.audio_player.reset_frame_count()
-                            self.last_audio_item_id = event.item_id
+        if event.type == "response.created":
+            response_id = getattr(event.response, 'id', 'unknown') if hasattr(event, 'response') else 'unknown'
+            debug(f"response created: {response_id}")
+            return
 
-                        bytes_data = base64.b64decode(event.delta)
-                        self.audio_player.add_data(bytes_data)
-                        continue
+        if event.type == "response.audio.delta":
+            if event.item_id != self.last_audio_item_id:
+                # debug(f"new audio item: {event.item_id}")
+                self.audio_player.reset_frame_count()
+                self.last_audio_item_id = event.item_id
 
-                    if event.type == "response.audio_transcript.delta":
-                        # Print the AI prefix only once when starting a new response
-                        if not self.response_started:
-                            print("🐛 ", end="", flush=True)
-                            self.response_started = True
+            bytes_data = base64.b64decode(event.delta)
+            self.audio_player.add_data(bytes_data)
+            return
 
-                        # Simply print the delta text (new characters only)
-                        print(event.delta, end="", flush=True)
-                        continue
+        if event.type == "response.audio_transcript.delta":
+            # Print the AI prefix only once when starting a new response
+            if not self.response_started:
+                print("🐛 ", end="", flush=True)
+                self.response_started = True
 
-                    if event.type == "response.done":
-                        debug("response completed")
-
-                        # Debug the response contents
-                        if hasattr(event, 'response'):
-                            response = event.response
-                            status = getattr(response, 'status', 'unknown')
-                            debug(f"response status: {status}")
-
-                            # If response failed, look for error details
-                            if status == 'failed':
-                                error("Response failed!")
-                                if hasattr(response, 'status_details'):
-                                    error(f"failure reason: {response.status_details}")
-                                if hasattr(response, 'error'):
-                                    error(f"response error: {response.error}")
-
-                            if hasattr(response, 'output'):
-                                debug(f"response has {len(response.output)} output items")
-                                for i, item in enumerate(response.output):
-                                    item_type = getattr(item, 'type', 'unknown')
-                                    debug(f"output item {i}: type={item_type}")
-                                    if hasattr(item, 'content'):
-                                        debug(f"  content: {getattr(item.content, 'text', 'no text') if hasattr(item, 'content') else 'no content'}")
-                            else:
-                                debug("response has no output")
-                        else:
-                            debug("event has no response object")
-
-                        # Print newline after response is complete
-                        if self.response_started:
-                            print()  # Move to new line after streaming is complete
-                            self.response_started = False
-
-                        # Check if response contains function calls
-                        if hasattr(event, 'response') and hasattr(event.response, 'output'):
-                            for output_item in event.response.output:
-                                if hasattr(output_item, 'type') and output_item.type == "function_call":
-                                    debug(f"function call detected: {output_item.name}")
-                                    await self.handle_function_call(output_item)
-                        continue
+            # Simply print the delta text (new characters only)
+            print(event.delta, end="", flush=True)
+            return
 
-                    if event.type == "input_audio_buffer.committed":
-                        debug("audio buffer committed")
-                        continue
+        if event.type == "response.done":
+            debug("response completed")
+
+            # Debug the response contents
+            if hasattr(event, 'response'):
+                response = event.response
+                status = getattr(response, 'status', 'unknown')
+                debug(f"response status: {status}")
+
+                # If response failed, look for error details
+                if status == 'failed':
+                    error("Response failed!")
+                    if hasattr(response, 'status_details'):
+                        error(f"failure reason: {response.status_details}")
+                    if hasattr(response, 'error'):
+                        error(f"response error: {response.error}")
+
+                if hasattr(response, 'output'):
+                    debug(f"response has {len(response.output)} output items")
+                    for i, item in enumerate(response.output):
+                        item_type = getattr(item, 'type', 'unknown')
+                        debug(f"output item {i}: type={item_type}")
+                        if hasattr(item, 'content'):
+                            debug(f"  content: {getattr(item.content, 'text', 'no text') if hasattr(item, 'content') else 'no content'}")
+                else:
+                    debug("response has no output")
+            else:
+                debug("event has no response object")
+
+            # Print newline after response is complete
+            if self.response_started:
+                print()  # Move to new line after streaming is complete
+                self.response_started = False
+
+            # Check if response contains function calls
+            if hasattr(event, 'response') and hasattr(event.response, 'output'):
+                function_calls = []
+                for output_item in event.response.output:
+                    if hasattr(output_item, 'type') and output_item.type == "function_call":
+                        debug(f"function call detected: {output_item.name}")
+                        function_calls.append(output_item)
+
+                # Run in the background so events keep flowing while approvals are pending
+                if function_calls:
+                    task = asyncio.create_task(self.handle_function_calls(function_calls))
+                    self.tool_tasks.add(task)
+                    task.add_done_callback(self.tool_tasks.discard)
+            return
 
-                    if event.type == "input_audio_buffer.speech_started":
-                        debug("speech started detected")
-                        continue
+        if event.type == "conversation.item.input_audio_transcription.completed":
+            debug(f"transcript: {event.transcript}")
+            if self.tool_index:
+                self.last_transcript = event.transcript
+                self.found_tools = []
+                # VAD doesn't create responses while selecting tools, so pick this turn's tools first
+                await self.update_active_tools(self.select_tools(event.transcript))
+                connection = await self._get_connection()
+                await connection.response.create()
+            return
 
-                    if event.type == "input_audio_buffer.speech_stopped":
-                        debug("speech stopped detected")
-                        continue
+        if event.type == "conversation.item.input_audio_transcription.failed":
+            error(f"transcription failed: {getattr(event, 'error', 'unknown error')}")
+            if self.tool_index:
+                # Still answer the turn, with the tools already loaded
+                connection = await self._get_connection()
+                await connection.response.create()
+            return
 
-                    if event.type == "conversation.item.created":
-                        if hasattr(event, 'item'):
-                            item = event.item
-                            item_type = getattr(item, 'type', 'unknown')
-                            item_id = getattr(item, 'id', 'unknown')
-                            debug(f"conversation item created: type={item_type}, id={item_id}")
-
-                            # Check if it's a message with content
-                            if item_type == 'message' and hasattr(item, 'content'):
-                                debug(f"message content length: {len(item.content)} items")
-                                for i, content in enumerate(item.content):
-                                    content_type = getattr(content, 'type', 'unknown')
-                                    debug(f"  content {i}: type={content_type}")
-                                    if content_type == 'input_audio' and hasattr(content, 'audio'):
-                                        audio_len = len(content.audio) if content.audio else 0
-                                        debug(f"    audio data length: {audio_len}")
-                        else:
-                            debug("conversation item created: no item details")
-                        continue
+        if event.type == "input_audio_buffer.committed":
+            debug("audio buffer committed")
+            return
 
-                    # Check for any response-related events we might be missing
-                    if "response" in event.type:
-                        debug(f"unhandled response event: {event.type}")
-                        if hasattr(event, 'item_id'):
-                            debug(f"  item_id: {event.item_id}")
-                        if hasattr(event, 'content_index'):
-                            debug(f"  content_index: {event.content_index}")
-                        # Look for any error information in response events
-                        if hasattr(event, 'error'):
-                            error(f"error in {event.type}: {event.error}")
-
-                    # Log any unhandled event types
-                    debug(f"unhandled event type: {event.type}")
+        if event.type == "input_audio_buffer.speech_started":
+            debug("speech started detected")
+            return
+
+        if event.type == "input_audio_buffer.speech_stopped":
+            debug("speech stopped detected")
+            return
+
+        if event.type == "conversation.item.created":
+            if hasattr(event, 'item'):
+                item = event.item
+                item_type = getattr(item, 'type', 'unknown')
+                item_id = getattr(item, 'id', 'unknown')
+                debug(f"conversation item created: type={item_type}, id={item_id}")
+
+                # Check if it's a message with content
+                if item_type == 'message' and hasattr(item, 'content'):
+                    debug(f"message content length: {len(item.content)} items")
+                    for i, content in enumerate(item.content):
+                        content_type = getattr(content, 'type', 'unknown')
+                        debug(f"  content {i}: type={content_type}")
+                        if content_type == 'input_audio' and hasattr(content, 'audio'):
+                            audio_len = len(content.audio) if content.audio else 0
+                            debug(f"    audio data length: {audio_len}")
+            else:
+                debug("conversation item created: no item details")
+            return
+
+        # Check for any response-related events we might be missing
+        if "response" in event.type:
+            debug(f"unhandled response event: {event.type}")
+            if hasattr(event, 'item_id'):
+                debug(f"  item_id: {event.item_id}")
+            if hasattr(event, 'content_index'):
+                debug(f"  content_index: {event.content_index}")
+            # Look for any error information in response events
+            if hasattr(event, 'error'):
+                error(f"error in {event.type}: {event.error}")
+
+        # Log any unhandled event types
+        debug(f"unhandled event type: {event.type}")
+
+    def session_tools_config(self) -> dict[str, Any]:
+        """Session fields for the current MCP tools, switching tool selection on or off by catalog size.
+
+        With selection on, input transcription is enabled and VAD stops creating
+        responses; the transcript handler creates each response once its tools are in place.
+        """
+        tools = self.mcp_client.available_tools
+        config: dict[str, Any] = {}
+        if self.max_tools and len(tools) > self.max_tools:
+            # Too many tools to send every turn, pick them from the user's transcript instead
+            self.tool_index = ToolIndex(tools)
+            tools_by_name = {tool["name"]: tool for tool in tools}
+            self.found_tools = [tools_by_name[tool["name"]] for tool in self.found_tools if tool["name"] in tools_by_name]
+            tools = self.select_tools(self.last_transcript)
+            # Tools are picked from the transcript, so VAD must leave creating the response to us
+            config["input_audio_transcription"] = {"model": "whisper-1"}
+            config["turn_detection"] = {"type": "server_vad", "create_response": False}
+            debug(f"{len(self.mcp_client.available_tools)} tools available, sending up to {self.max_tools} per turn")
+        else:
+            self.tool_index = None
+            self.found_tools = []
+            config["input_audio_transcription"] = None
+            config["turn_detection"] = {"type": "server_vad", "create_response": True}
+        config["tools"] = tools
+        self.active_tool_names = [tool["name"] for tool in tools]
+        return config
+
+    async def watch_config_files(self, interval: float = 1.0) -> None:
+        """Poll system_prompt.md and mcp.json and apply changes to the live session."""
+        def signature(path: str) -> tuple[int, int] | None:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                return None
+            return stat.st_mtime_ns, stat.st_size
+
+        prompt_signature = signature("system_prompt.md")
+        mcp_signature = signature("mcp.json")
+        try:
+            while True:
+                await asyncio.sleep(interval)
+
+                current = signature("system_prompt.md")
+                if current != prompt_signature:
+                    prompt_signature = current
+                    try:
+                        await self.reload_system_prompt()
+                    except Exception as e:
+                        error(f"failed to reload system_prompt.md: {e}")
+
+                current = signature("mcp.json")
+                if current != mcp_signature:
+                    mcp_signature = current
+                    try:
+                        await self.reload_mcp_config()
+                    except Exception as e:
+                        error(f"failed to reload mcp.json: {e}")
         except asyncio.CancelledError:
-            # Task was cancelled, exit gracefully
             pass
-        except Exception as e:
-            error(f"realtime connection error: {e}")
+
+    async def reload_system_prompt(self) -> None:
+        """Send the updated system prompt to the live session."""
+        try:
+            instructions = load_system_prompt()
+        except Exception:
+            error("keeping the current system prompt")
+            return
+        connection = await self._get_connection()
+        await connection.session.update(session={"instructions": instructions})
+        info("system prompt reloaded")
+
+    async def reload_mcp_config(self) -> None:
+        """Restart only the MCP servers whose config changed and re-register tools."""
+        try:
+            config = self.mcp_client.load_config()
+        except json.JSONDecodeError:
+            error("keeping the current MCP servers")
+            return
+
+        added, removed, changed, recompacted = await self.mcp_client.apply_config(config)
+        if not (added or removed or changed or recompacted):
+            return
+        for label, names in (
+            ("added", added), ("removed", removed), ("restarted", changed), ("with new schema options", recompacted)
+        ):
+            if names:
+                info(f"MCP servers {label}: {', '.join(names)}")
+
+        connection = await self._get_connection()
+        await connection.session.update(session=self.session_tools_config())
+        debug(f"session now has {len(self.active_tool_names)} tools")
+
+    def select_tools(self, transcript: str) -> list[dict]:
+        """Pick the tools to offer for a user turn."""
+        assert self.tool_index is not None
+        tools = self.tool_index.select(transcript, self.max_tools)
+        names = {tool["name"] for tool in tools}
+        tools += [tool for tool in self.found_tools if tool["name"] not in names]
+        return tools + [find_tools_definition()]
+
+    async def update_active_tools(self, tools: list[dict]) -> None:
+        """Send a reduced tools list to the session if it changed."""
+        names = [tool["name"] for tool in tools]
+        if names == self.active_tool_names:
+            return
+        self.active_tool_names = names
+        debug(f"switching to tools: {', '.join(names)}")
+        connection = await self._get_connection()
+        await connection.session.update(session={"tools": tools})
+
+    async def handle_find_tools(self, function_call_item: Any, args: dict) -> None:
+        """Load tools matching the model's query and report them back."""
+        assert self.tool_index is not None
+        matches = self.tool_index.search(args.get("query", ""), self.max_tools)
+        found_names = {tool["name"] for tool in self.found_tools}
+        self.found_tools += [tool for tool in matches if tool["name"] not in found_names]
+        await self.update_active_tools(self.select_tools(self.last_transcript))
+
+        output = {"loaded_tools": [{"name": tool["name"], "description": tool["description"]} for tool in matches]}
+        if not matches:
+            output = {"error": "No matching tools found"}
+
+        await self.send_function_call_output(function_call_item, output)
 
     async def _get_connection(self) -> AsyncRealtimeConnection:
         await self.connected.wait()
         assert self.connection is not None
         return self.connection
 
-    def approve_pending_tool(self):
-        """Approve the pending tool call (called by keyboard listener)."""
-        if self.pending_tool_approval:
-            tool_name, args, future = self.pending_tool_approval
-            if not future.done():
-                future.set_result(True)
-                info("tool call approved (Right Cmd)")
-
-    def reject_pending_tool(self):
-        """Reject the pending tool call (called by keyboard listener)."""
-        if self.pending_tool_approval:
-            tool_name, args, future = self.pending_tool_approval
-            if not future.done():
-                future.set_result(False)
-                info("tool call rejected (Right Option)")
-
-    async def get_user_approval(self, tool_name: str, args: dict) -> bool:
-        """Get user approval for tool execution via main input loop."""
-        # Set up pending approval and wait for result
-        future = asyncio.Future()
-        self.pending_tool_approval = (tool_name, args, future)
+    async def get_user_approval(self, tool_name: str, args: dict) -> str:
+        """Get user approval for tool execution via keyboard listener or main input loop.
+
+        Returns the decision: "approved", "rejected", "timed_out" or "cancelled".
+        """
+        # Queue the approval and wait for result
+        approval = self.approvals.request(tool_name, args)
 
         # Display the tool request
-        tool_msg = f"tool call request: {tool_name}"
+        tool_msg = f"tool call request #{approval.request_id}: {tool_name}"
         if args:
             for key, value in args.items():
                 tool_msg += f"\n   {key}: {value}"
         info(tool_msg)
-        info("approve this tool call? Press Right Cmd to approve, Right Option to reject (or 'y'/'n' + Enter)")
+        if len(self.approvals.pending) > 1:
+            info(f"{len(self.approvals.pending)} tool calls waiting, oldest first. Shift + Right Cmd/Option (or 'ya'/'na' + Enter) approves/rejects all, 'y <id>'/'n <id>' picks one")
+        else:
+            info("approve this tool call? Press Right Cmd to approve, Right Option to reject (or 'y'/'n' + Enter)")
+
+        # Wait for keyboard listener, CLI input or timeout to resolve this
+        await approval.future
+        return approval.decision or "rejected"
 
-        # Wait for keyboard listener or CLI input to resolve this
-        return await future
+    async def handle_function_calls(self, function_call_items: list[Any]) -> None:
+        """Handle all function calls from one response concurrently, then let the model respond."""
+        results = await asyncio.gather(
+            *(self.handle_function_call(item) for item in function_call_items), return_exceptions=True
+        )
+        for item, result in zip(function_call_items, results):
+            if isinstance(result, asyncio.CancelledError):
+                return
+            if isinstance(result, Exception):
+                error(f"function call {item.name} failed: {result}")
+                # Every call needs an output, or the model is left waiting on it
+                try:
+                    await self.send_function_call_output(item, {"error": f"Tool call failed: {result}"})
+                except Exception as e:
+                    error(f"failed to report error for {item.name}: {e}")
+
+        # Generate a response from the model
+        connection = await self._get_connection()
+        await connection.response.create()
+
+    async def send_function_call_output(self, function_call_item: Any, output: dict) -> None:
+        """Send a function call's output back to the model."""
+        connection = await self._get_connection()
+        await connection.conversation.item.create(
+            item={
+                "type": "function_call_output",
+                "call_id": function_call_item.call_id,
+                "output": json.dumps(output)
+            }
+        )
 
     async def handle_function_call(self, function_call_item: Any) -> None:
-        """Handle function calls from the model."""
+        """Handle a function call from the model and send back its output."""
         tool_name = function_call_item.name
 
         # Parse the function arguments
@@ -551,20 +1057,26 @@ class RealtimeApp:
         except json.JSONDecodeError:
             args = {}
 
+        # Tool search is local and read-only, so it doesn't need approval
+        if tool_name == FIND_TOOLS_NAME and self.tool_index:
+            await self.handle_find_tools(function_call_item, args)
+            return
+
         # Get user approval for tool execution
-        approved = await self.get_user_approval(tool_name, args)
-
-        if not approved:
-            # Send denial result back to the model
-            connection = await self._get_connection()
-            await connection.conversation.item.create(
-                item={
-                    "type": "function_call_output",
-                    "call_id": function_call_item.call_id,
-                    "output": json.dumps({"error": "Tool call denied by user"})
-                }
+        decision = await self.get_user_approval(tool_name, args)
+
+        if decision != "approved":
+            if self.recorder:
+                self.recorder.record_tool_call(tool_name, args, approved=False)
+
+            # Send denial result back to the model, saying why so a timeout isn't taken as a refusal
+            messages = {
+                "timed_out": "Tool call timed out waiting for user approval (the user did not respond)",
+                "cancelled": "Tool call cancelled before the user responded",
+            }
+            await self.send_function_call_output(
+                function_call_item, {"error": messages.get(decision, "Tool call denied by user")}
             )
-            await connection.response.create()
             return
 
         # Handle MCP tool calls
@@ -574,18 +1086,11 @@ class RealtimeApp:
         # Display the result
         self.mcp_client.print_result(tool_name, args, result)
 
-        # Send function call result back to the model
-        connection = await self._get_connection()
-        await connection.conversation.item.create(
-            item={
-                "type": "function_call_output",
-                "call_id": function_call_item.call_id,
-                "output": json.dumps(self.mcp_client.serialize_mcp_result(result))
-            }
-        )
+        if self.recorder:
+            self.recorder.record_tool_call(tool_name, args, approved=True, result=self.mcp_client.serialize_mcp_result(result))
 
-        # Generate a response from the model
-        await connection.response.create()
+        # Send function call result back to the model
+        await self.send_function_call_output(function_call_item, self.mcp_client.serialize_mcp_result(result))
 
     async def send_mic_audio(self) -> None:
         import sounddevice as sd  # type: ignore
@@ -595,11 +1100,11 @@ class RealtimeApp:
         # Query devices but don't print the list
         sd.query_devices()
 
-        read_size = int(SAMPLE_RATE * 0.02)
+        read_size = int(self.codec.sample_rate * 0.02)
 
         stream = sd.InputStream(
             channels=CHANNELS,
-            samplerate=SAMPLE_RATE,
+            samplerate=self.codec.sample_rate,
             dtype="int16",
         )
         stream.start()
@@ -613,7 +1118,11 @@ class RealtimeApp:
                 await self.should_send_audio.wait()
                 self.is_recording = True
 
-                data, _ = stream.read(read_size)
+                data, overflowed = stream.read(read_size)
+                if overflowed:
+                    metrics.mic_frames_dropped_total.inc()
+                if self.recorder:
+                    self.recorder.record_audio("mic", data.tobytes())
 
                 connection = await self._get_connection()
                 if not sent_audio:
@@ -623,8 +1132,10 @@ class RealtimeApp:
                     sent_audio = True
 
                 try:
-                    await connection.input_audio_buffer.append(audio=base64.b64encode(cast(Any, data)).decode("utf-8"))
+                    await connection.input_audio_buffer.append(audio=base64.b64encode(self.codec.encode(cast(Any, data))).decode("utf-8"))
+                    metrics.mic_frames_sent_total.inc()
                 except Exception as e:
+                    metrics.mic_frames_dropped_total.inc()
                     error(f"failed to append audio data: {e}")
                     if "1000" in str(e):
                         error("connection closed normally - likely due to end of conversation")
@@ -644,6 +1155,49 @@ class RealtimeApp:
             stream.stop()
             stream.close()
 
+    async def send_replay_audio(self) -> None:
+        """Send recorded mic frames in place of the microphone, at their original pace.
+
+        Like the live mic, frames are only sent while recording is on ('k' + Enter);
+        the replay pauses while it is off.
+        """
+        connection = await self._get_connection()
+        # Wait for the audio format, VAD, tools and instructions to be in place
+        await self.session_configured.wait()
+        info(f"replaying mic audio from {self.replay_path} (press 'k' + Enter to start)")
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first_t = None
+        try:
+            for entry in load_recording(self.replay_path, kinds=("mic",)):
+                if first_t is None:
+                    first_t = entry.t
+                    started = loop.time()
+
+                if not self.should_send_audio.is_set():
+                    # Shift the timeline by however long recording was off
+                    paused = loop.time()
+                    await self.should_send_audio.wait()
+                    started += loop.time() - paused
+
+                delay = started + (entry.t - first_t) - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                if self.recorder:
+                    self.recorder.record_audio("mic", entry.audio)
+
+                await connection.input_audio_buffer.append(
+                    audio=base64.b64encode(self.codec.encode(np.frombuffer(entry.audio, dtype=np.int16))).decode("utf-8")
+                )
+                metrics.mic_frames_sent_total.inc()
+            info("replay finished")
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            error(f"replay error: {e}")
+
     async def handle_input(self) -> None:
         """Handle user input from terminal."""
         import asyncio
@@ -663,19 +1217,22 @@ class RealtimeApp:
                     user_input = await loop.run_in_executor(None, get_input)
 
                     # Handle tool approval if pending
-                    if self.pending_tool_approval:
-                        tool_name, args, future = self.pending_tool_approval
-                        if user_input.lower() in ['y', 'yes']:
-                            future.set_result(True)
-                            debug("tool call approved")
-                        elif user_input.lower() in ['n', 'no']:
-                            future.set_result(False)
-                            debug("tool call denied")
+                    if self.approvals.pending:
+                        answer, _, request_id = user_input.strip().lower().partition(" ")
+                        if answer in ['y', 'yes', 'n', 'no']:
+                            approved = answer in ['y', 'yes']
+                            if request_id.isdigit():
+                                if not self.approvals.resolve(int(request_id), approved):
+                                    print(f"no pending tool call #{request_id}")
+                                    continue
+                            else:
+                                self.approvals.resolve_oldest(approved)
+                            debug(f"tool call {'approved' if approved else 'denied'}")
+                        elif answer in ['ya', 'na']:
+                            count = self.approvals.resolve_all(answer == 'ya')
+                            debug(f"{count} tool calls {'approved' if answer == 'ya' else 'denied'}")
                         else:
-                            print("please enter 'y' for yes or 'n' for no:")
-                            continue
-
-                        self.pending_tool_approval = None
+                            print("please enter 'y' for yes or 'n' for no ('ya'/'na' for all, 'y <id>'/'n <id>' for one):")
                         continue
 
                     if user_input == "q":
@@ -714,8 +1271,71 @@ class RealtimeApp:
             print("\n"); info("goodbye!")
 
 
+def parse_args() -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Voice-controlled AI assistant with a local MCP bridge.")
+    parser.add_argument(
+        "--audio-format",
+        choices=AUDIO_FORMATS,
+        default="pcm16",
+        help="audio format for both directions; g711_ulaw/g711_alaw use ~83%% less bandwidth than pcm16",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="serve Prometheus metrics at http://127.0.0.1:PORT/metrics",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="FILE",
+        default=None,
+        help="record mic audio, response audio, Realtime events and tool calls to FILE",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="FILE",
+        default=None,
+        help="send the mic audio from a recording instead of the microphone",
+    )
+    parser.add_argument(
+        "--max-tools",
+        type=int,
+        default=20,
+        help="when more MCP tools are available, send only the N most relevant to each turn (0 sends all)",
+    )
+    parser.add_argument(
+        "--approval-timeout",
+        type=float,
+        default=120.0,
+        help="seconds to wait for each tool approval before rejecting it (0 waits forever)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PREFIX",
+        nargs="?",
+        const="typo-profile",
+        default=None,
+        help="profile event loop lag and audio callbacks, writing PREFIX.json and PREFIX.folded on exit",
+    )
+    return parser.parse_args()
+
+
 async def main():
-    app = RealtimeApp()
+    args = parse_args()
+    audio_format = args.audio_format
+    if args.replay:
+        # Replayed frames are pcm16 at the recording's sample rate
+        audio_format = read_header(args.replay).get("audio_format", audio_format)
+    app = RealtimeApp(
+        audio_format=audio_format,
+        metrics_port=args.metrics_port,
+        record_path=args.record,
+        replay_path=args.replay,
+        max_tools=args.max_tools,
+        approval_timeout=args.approval_timeout or None,
+        profile_prefix=args.profile,
+    )
     try:
         await app.start()
     except KeyboardInterrupt: